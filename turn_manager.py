@@ -3,6 +3,9 @@ from tkinter import ttk, messagebox
 import sqlite3
 import json
 import datetime
+import functools
+import heapq
+import threading
 
 # Try to import tksheet for a spreadsheet-like widget; if unavailable, we’ll fall back to Treeview.
 try:
@@ -16,20 +19,62 @@ except ImportError:
 # =============================================================================
 class DatabaseManager:
     def __init__(self, db_file="shift_scheduler.db"):
-        self.conn = sqlite3.connect(db_file)
+        # cached_statements keeps compiled statements around keyed on SQL
+        # text, so the repeated small queries below are prepared only once.
+        # check_same_thread=False lets background threads (e.g. schedule
+        # generation) share this connection; sqlite3 serialises individual
+        # statements, and self.lock serialises every write transaction:
+        # sqlite3 autocommits when the outermost `with conn:` block exits,
+        # so an unguarded single-row write on the main thread would commit
+        # a worker's half-built multi-statement transaction.
+        self.conn = sqlite3.connect(db_file, cached_statements=256, check_same_thread=False)
+        self.lock = threading.Lock()
+        # Row supports both index and name access at C level, so result
+        # handling can use column names without building dicts per row.
+        self.conn.row_factory = sqlite3.Row
+        # Tune the connection: WAL avoids the rollback-journal fsync on every
+        # commit (this module does many single-row writes from the UI thread),
+        # synchronous=NORMAL is safe with WAL, and the rest keep temp data and
+        # the page cache in memory.
+        cursor = self.conn.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute("PRAGMA temp_store=MEMORY")
+        cursor.execute("PRAGMA cache_size=-20000")
+        cursor.execute("PRAGMA mmap_size=268435456")
+        cursor.execute("PRAGMA foreign_keys=ON")
+        # Settings are tiny and read constantly (schedule generation, stats,
+        # dialogs); keep them in a dict loaded on first access and kept in
+        # sync by set_setting.
+        self._settings_cache = None
+        # The employee list is re-read by every dialog and refresh; cache
+        # it and clear on any employee mutation.
+        self._employees_cache = None
+        # Per-(year, month) festivity maps; festivities change rarely but
+        # are fetched on every schedule/stats action and month navigation.
+        self._fest_cache = {}
+        # Accumulated-hours recomputation is skipped while nothing that
+        # feeds it (shifts, targets, durations) has changed; starts dirty
+        # so the first call after startup always recalculates.
+        self._stats_dirty = True
         self.create_tables()
 
     def create_tables(self):
         cursor = self.conn.cursor()
         
-        # Employees table.
+        # Employees table. Preferences are three small ints (0=avoid,
+        # 1=neutral, 2=prefer), stored as columns so reading the roster
+        # never has to run a JSON parser per row.
         cursor.execute('''CREATE TABLE IF NOT EXISTS employees (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
             name TEXT NOT NULL,
             target_hours INTEGER NOT NULL,
             accumulated_hours INTEGER NOT NULL,
-            preferences TEXT NOT NULL
+            pref_morning INTEGER NOT NULL DEFAULT 1,
+            pref_afternoon INTEGER NOT NULL DEFAULT 1,
+            pref_night INTEGER NOT NULL DEFAULT 1
         )''')
+        self._migrate_preferences(cursor)
         
         # Schedules table (to save a schedule snapshot)
         cursor.execute('''CREATE TABLE IF NOT EXISTS schedules (
@@ -74,6 +119,18 @@ class DatabaseManager:
             value TEXT
         )''')
         
+        # Indexes for the month-range queries; without them every schedule
+        # refresh scans the full shifts/absences history.
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_shifts_date ON shifts(shift_date, shift_type)")
+        # (idx_shifts_emp was a plain employee_id index; the composite also
+        # covers the per-employee date-range scans in the statistics query.)
+        cursor.execute("DROP INDEX IF EXISTS idx_shifts_emp")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_shifts_emp_date ON shifts(employee_id, shift_date)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_abs_range ON absences(start_date, end_date)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_abs_emp_range ON absences(employee_id, start_date, end_date)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_fest_date ON festivities(date)")
+        cursor.execute("ANALYZE")
+
         # Insert default settings if they do not already exist.
         defaults = {
             'default_target_hours': '160',
@@ -84,62 +141,163 @@ class DatabaseManager:
             'staffing_afternoon': '2',
             'staffing_night': '1'
         }
-        for key, value in defaults.items():
-            cursor.execute("INSERT OR IGNORE INTO settings (key, value) VALUES (?, ?)", (key, value))
+        cursor.executemany("INSERT OR IGNORE INTO settings (key, value) VALUES (?, ?)",
+                           list(defaults.items()))
         self.conn.commit()
 
+    def _migrate_preferences(self, cursor):
+        """
+        Older databases stored preferences as a JSON TEXT column; split it
+        into the three integer columns once, then drop the old column.
+        """
+        columns = [row[1] for row in cursor.execute("PRAGMA table_info(employees)")]
+        if "preferences" not in columns:
+            return
+        for col in ("pref_morning", "pref_afternoon", "pref_night"):
+            if col not in columns:
+                cursor.execute(f"ALTER TABLE employees ADD COLUMN {col} INTEGER NOT NULL DEFAULT 1")
+        for emp_id, pref_json in cursor.execute("SELECT id, preferences FROM employees").fetchall():
+            prefs = json.loads(pref_json)
+            cursor.execute('''UPDATE employees SET pref_morning=?, pref_afternoon=?, pref_night=?
+                              WHERE id=?''',
+                           (prefs.get("Morning", 1), prefs.get("Afternoon", 1),
+                            prefs.get("Night", 1), emp_id))
+        cursor.execute("ALTER TABLE employees DROP COLUMN preferences")
+
+    @staticmethod
+    @functools.lru_cache(maxsize=128)
+    def _month_bounds(year, month):
+        """Return (first_day, first_day_of_next_month) as ISO date strings."""
+        first = datetime.date(year, month, 1)
+        nxt = datetime.date(year + month // 12, month % 12 + 1, 1)
+        return first.isoformat(), nxt.isoformat()
+
+    def _insert_many(self, table, cols, rows, chunk=100):
+        """
+        Insert rows with the multi-row VALUES (...),(...) form in one
+        transaction. Compared to executemany this keeps the VDBE loop
+        inside SQLite instead of returning to Python per row. Chunks of
+        100 rows stay well under the 999 bound-parameter limit. table and
+        cols are internal constants, never user input.
+        """
+        rows = list(rows)
+        placeholder = "(" + ",".join("?" * len(cols)) + ")"
+        with self.lock, self.conn:
+            for i in range(0, len(rows), chunk):
+                batch = rows[i:i + chunk]
+                sql = (f"INSERT INTO {table} ({','.join(cols)}) VALUES "
+                       + ",".join([placeholder] * len(batch)))
+                self.conn.execute(sql, [v for r in batch for v in r])
+
+    @staticmethod
+    def _pref_columns(preferences):
+        return (preferences.get("Morning", 1), preferences.get("Afternoon", 1),
+                preferences.get("Night", 1))
+
     # ----- Employee Operations -----
     def add_employee(self, name, target_hours, accumulated_hours, preferences):
-        cursor = self.conn.cursor()
-        pref_json = json.dumps(preferences)
-        cursor.execute('''INSERT INTO employees (name, target_hours, accumulated_hours, preferences)
-                          VALUES (?, ?, ?, ?)''', (name, target_hours, accumulated_hours, pref_json))
-        self.conn.commit()
+        with self.lock, self.conn:
+            cursor = self.conn.execute('''INSERT INTO employees (name, target_hours, accumulated_hours,
+                                                                 pref_morning, pref_afternoon, pref_night)
+                                          VALUES (?, ?, ?, ?, ?, ?)''',
+                                       (name, target_hours, accumulated_hours) + self._pref_columns(preferences))
+        self._employees_cache = None
+        return cursor.lastrowid
 
     def update_employee(self, emp_id, name, target_hours, accumulated_hours, preferences):
-        cursor = self.conn.cursor()
-        pref_json = json.dumps(preferences)
-        cursor.execute('''UPDATE employees 
-                          SET name=?, target_hours=?, accumulated_hours=?, preferences=? 
-                          WHERE id=?''',
-                          (name, target_hours, accumulated_hours, pref_json, emp_id))
-        self.conn.commit()
+        with self.lock, self.conn:
+            self.conn.execute('''UPDATE employees
+                                 SET name=?, target_hours=?, accumulated_hours=?,
+                                     pref_morning=?, pref_afternoon=?, pref_night=?
+                                 WHERE id=?''',
+                              (name, target_hours, accumulated_hours) + self._pref_columns(preferences) + (emp_id,))
+        self._employees_cache = None
+        self._stats_dirty = True
+
+    def add_employees_bulk(self, employees):
+        """
+        Insert many employees at once inside a single transaction.
+        Each item is a dict with the same keys add_employee takes.
+        One commit (and one fsync) instead of one per row.
+        """
+        rows = [(e["name"], e["target_hours"], e["accumulated_hours"]) + self._pref_columns(e["preferences"])
+                for e in employees]
+        self._insert_many("employees",
+                          ("name", "target_hours", "accumulated_hours",
+                           "pref_morning", "pref_afternoon", "pref_night"), rows)
+        self._employees_cache = None
 
     def delete_employee(self, emp_id):
-        cursor = self.conn.cursor()
-        cursor.execute('''DELETE FROM employees WHERE id=?''', (emp_id,))
-        self.conn.commit()
+        with self.lock, self.conn:
+            # shifts and absences reference employees(id) without ON DELETE
+            # CASCADE, so with foreign_keys=ON the dependent rows must go
+            # first — in the same transaction, so a failure leaves nothing
+            # half-deleted.
+            self.conn.execute('''DELETE FROM shifts WHERE employee_id=?''', (emp_id,))
+            self.conn.execute('''DELETE FROM absences WHERE employee_id=?''', (emp_id,))
+            self.conn.execute('''DELETE FROM employees WHERE id=?''', (emp_id,))
+        self._employees_cache = None
+        self._stats_dirty = True
 
     def get_employees(self):
-        cursor = self.conn.cursor()
-        cursor.execute('''SELECT id, name, target_hours, accumulated_hours, preferences FROM employees''')
-        rows = cursor.fetchall()
-        employees = []
-        for row in rows:
-            emp = {
-                "id": row[0],
-                "name": row[1],
-                "target_hours": row[2],
-                "accumulated_hours": row[3],
-                "preferences": json.loads(row[4])
-            }
-            employees.append(emp)
-        return employees
+        if self._employees_cache is None:
+            cursor = self.conn.execute('''SELECT id, name, target_hours, accumulated_hours,
+                                                 pref_morning, pref_afternoon, pref_night FROM employees''')
+            self._employees_cache = [{
+                "id": row["id"],
+                "name": row["name"],
+                "target_hours": row["target_hours"],
+                "accumulated_hours": row["accumulated_hours"],
+                "preferences": {"Morning": row["pref_morning"],
+                                "Afternoon": row["pref_afternoon"],
+                                "Night": row["pref_night"]}
+            } for row in cursor]
+        return self._employees_cache
+
+    def get_employees_for_display(self):
+        """
+        Rows ready for the employee list widget, with the preferences
+        string pre-formatted by SQLite's printf so no per-row string
+        building happens in Python.
+        """
+        cursor = self.conn.execute('''SELECT id, name, target_hours, accumulated_hours,
+                                             printf('Morning:%d, Afternoon:%d, Night:%d',
+                                                    pref_morning, pref_afternoon, pref_night)
+                                      FROM employees''')
+        return cursor.fetchall()
+
+    def get_employee(self, emp_id):
+        row = self.conn.execute('''SELECT id, name, target_hours, accumulated_hours,
+                                          pref_morning, pref_afternoon, pref_night
+                                   FROM employees WHERE id=?''', (emp_id,)).fetchone()
+        if row is None:
+            return None
+        return {
+            "id": row["id"],
+            "name": row["name"],
+            "target_hours": row["target_hours"],
+            "accumulated_hours": row["accumulated_hours"],
+            "preferences": {"Morning": row["pref_morning"],
+                            "Afternoon": row["pref_afternoon"],
+                            "Night": row["pref_night"]}
+        }
 
     # ----- Shift Operations -----
     def add_shift(self, shift_date, shift_type, employee_id):
-        cursor = self.conn.cursor()
-        cursor.execute('''INSERT INTO shifts (shift_date, shift_type, employee_id)
-                          VALUES (?, ?, ?)''', (shift_date, shift_type, employee_id))
-        self.conn.commit()
+        self.add_shifts([(shift_date, shift_type, employee_id)])
+
+    def add_shifts(self, rows):
+        """
+        Insert many shifts ((shift_date, shift_type, employee_id) tuples)
+        in one transaction. Bulk callers like the schedule generator should
+        use this instead of looping add_shift, which commits per row.
+        """
+        self._insert_many("shifts", ("shift_date", "shift_type", "employee_id"), rows)
+        self._stats_dirty = True
 
     def get_shifts_for_month(self, year, month):
         cursor = self.conn.cursor()
-        start_date = f"{year}-{month:02d}-01"
-        if month == 12:
-            end_date = f"{year+1}-01-01"
-        else:
-            end_date = f"{year}-{month+1:02d}-01"
+        start_date, end_date = self._month_bounds(year, month)
         cursor.execute('''SELECT s.id, s.shift_date, s.shift_type, s.employee_id, e.name 
                           FROM shifts s 
                           JOIN employees e ON s.employee_id = e.id
@@ -148,50 +306,86 @@ class DatabaseManager:
         rows = cursor.fetchall()
         return rows
 
+    def get_shifts_for_employee_month(self, year, month, employee_id):
+        """One employee's shifts for a month, filtered in SQL rather than
+        fetching the whole month and filtering in Python."""
+        start_date, end_date = self._month_bounds(year, month)
+        cursor = self.conn.execute('''SELECT s.id, s.shift_date, s.shift_type, s.employee_id, e.name
+                                      FROM shifts s
+                                      JOIN employees e ON s.employee_id = e.id
+                                      WHERE s.employee_id = ? AND s.shift_date >= ? AND s.shift_date < ?
+                                      ORDER BY s.shift_date, s.shift_type''',
+                                   (employee_id, start_date, end_date))
+        return cursor.fetchall()
+
     def clear_shifts_for_month(self, year, month):
-        cursor = self.conn.cursor()
-        start_date = f"{year}-{month:02d}-01"
-        if month == 12:
-            end_date = f"{year+1}-01-01"
-        else:
-            end_date = f"{year}-{month+1:02d}-01"
-        cursor.execute('''DELETE FROM shifts WHERE shift_date >= ? AND shift_date < ?''', (start_date, end_date))
-        self.conn.commit()
-    
+        start_date, end_date = self._month_bounds(year, month)
+        with self.lock, self.conn:
+            self.conn.execute('''DELETE FROM shifts WHERE shift_date >= ? AND shift_date < ?''', (start_date, end_date))
+        self._stats_dirty = True
+
+    def replace_shifts_for_month(self, year, month, rows):
+        """
+        Atomically replace the month's shifts: delete the old records and
+        insert the new ones (rows of (shift_date, shift_type, employee_id))
+        in one transaction, so a regenerated month costs a single commit
+        and can never be half-written.
+        """
+        start_date, end_date = self._month_bounds(year, month)
+        with self.lock, self.conn:
+            self.conn.execute('''DELETE FROM shifts WHERE shift_date >= ? AND shift_date < ?''',
+                              (start_date, end_date))
+            self.conn.executemany('''INSERT INTO shifts (shift_date, shift_type, employee_id)
+                                     VALUES (?, ?, ?)''', rows)
+        self._stats_dirty = True
+
     def update_shift_assignment(self, shift_id, employee_id):
-        cursor = self.conn.cursor()
-        cursor.execute("UPDATE shifts SET employee_id = ? WHERE id = ?", (employee_id, shift_id))
-        self.conn.commit()
+        with self.lock, self.conn:
+            self.conn.execute("UPDATE shifts SET employee_id = ? WHERE id = ?", (employee_id, shift_id))
+        self._stats_dirty = True
+
+    def update_shift_assignments(self, pairs):
+        """Apply many (employee_id, shift_id) reassignments in one transaction."""
+        with self.lock, self.conn:
+            self.conn.executemany("UPDATE shifts SET employee_id = ? WHERE id = ?", pairs)
+        self._stats_dirty = True
 
 
     # ----- Absence Operations -----
     def add_absence(self, employee_id, start_date, end_date, absence_type):
-        cursor = self.conn.cursor()
-        cursor.execute('''INSERT INTO absences (employee_id, start_date, end_date, absence_type)
-                          VALUES (?, ?, ?, ?)''', (employee_id, start_date, end_date, absence_type))
-        self.conn.commit()
+        with self.lock, self.conn:
+            cursor = self.conn.execute('''INSERT INTO absences (employee_id, start_date, end_date, absence_type)
+                                          VALUES (?, ?, ?, ?)''', (employee_id, start_date, end_date, absence_type))
+        return cursor.lastrowid
+
+    def add_absences_bulk(self, rows):
+        """
+        Insert many absence records at once in a single transaction.
+        Each row is a (employee_id, start_date, end_date, absence_type) tuple.
+        """
+        self._insert_many("absences", ("employee_id", "start_date", "end_date", "absence_type"), rows)
+
+    def delete_absence(self, absence_id):
+        with self.lock, self.conn:
+            self.conn.execute("DELETE FROM absences WHERE id=?", (absence_id,))
+
+    def get_absences_for_month_raw(self, year, month):
+        """Raw (employee_id, start_date, end_date, absence_type) rows with
+        the dates left as stored strings, for display paths that never
+        compare dates and so have no reason to pay for parsing."""
+        first_day_str, next_month_str = self._month_bounds(year, month)
+        return self.conn.execute('''SELECT employee_id, start_date, end_date, absence_type FROM absences
+                                    WHERE start_date < ? AND end_date >= ?''',
+                                 (next_month_str, first_day_str)).fetchall()
 
     def get_absences_for_month(self, year, month):
-        first_day_str = f"{year}-{month:02d}-01"
-        if month == 12:
-            next_month_str = f"{year+1}-01-01"
-        else:
-            next_month_str = f"{year}-{month+1:02d}-01"
-        cursor = self.conn.cursor()
-        query = '''SELECT employee_id, start_date, end_date, absence_type FROM absences
-                   WHERE start_date < ? AND end_date >= ?'''
-        cursor.execute(query, (next_month_str, first_day_str))
-        rows = cursor.fetchall()
-        absences = []
-        for row in rows:
-            absence = {
-                "employee_id": row[0],
-                "start_date": datetime.datetime.strptime(row[1], "%Y-%m-%d").date(),
-                "end_date": datetime.datetime.strptime(row[2], "%Y-%m-%d").date(),
-                "absence_type": row[3]
-            }
-            absences.append(absence)
-        return absences
+        # date.fromisoformat is a C fast-path, far cheaper than strptime.
+        return [{
+            "employee_id": row[0],
+            "start_date": datetime.date.fromisoformat(row[1]),
+            "end_date": datetime.date.fromisoformat(row[2]),
+            "absence_type": row[3]
+        } for row in self.get_absences_for_month_raw(year, month)]
     
     
     # ----- Absence Operations -----
@@ -200,63 +394,158 @@ class DatabaseManager:
         Insert a single festivity date, marking whether it's a working day or not.
         is_working_day is a boolean; store as 1 or 0.
         """
-        cursor = self.conn.cursor()
-        cursor.execute('INSERT INTO festivities (date, is_working_day) VALUES (?, ?)', 
-                    (date_str, 1 if is_working_day else 0))
-        self.conn.commit()
+        with self.lock, self.conn:
+            cursor = self.conn.execute('INSERT INTO festivities (date, is_working_day) VALUES (?, ?)',
+                                       (date_str, 1 if is_working_day else 0))
+        self._fest_cache.clear()
+        return cursor.lastrowid
+
+    def update_festivity(self, fest_id, date_str, is_working_day):
+        with self.lock, self.conn:
+            self.conn.execute("UPDATE festivities SET date=?, is_working_day=? WHERE id=?",
+                              (date_str, 1 if is_working_day else 0, fest_id))
+        self._fest_cache.clear()
+
+    def delete_festivity(self, fest_id):
+        with self.lock, self.conn:
+            self.conn.execute("DELETE FROM festivities WHERE id=?", (fest_id,))
+        self._fest_cache.clear()
+
+    def add_festivities_bulk(self, rows):
+        """
+        Insert many festivities in one transaction.
+        rows: iterable of (date_str, is_working_day) tuples.
+        """
+        self._insert_many("festivities", ("date", "is_working_day"),
+                          [(d, 1 if w else 0) for d, w in rows])
+        self._fest_cache.clear()
 
     def get_festivities_for_month(self, year, month):
         """
         Return a dict where keys are 'YYYY-MM-DD' and values are True/False for is_working_day.
+        Cached per month; any festivity mutation clears the cache.
         """
-        start_date = f"{year}-{month:02d}-01"
-        if month == 12:
-            end_date = f"{year+1}-01-01"
-        else:
-            end_date = f"{year}-{month+1:02d}-01"
-        cursor = self.conn.cursor()
-        cursor.execute('SELECT date, is_working_day FROM festivities WHERE date >= ? AND date < ?',
-                    (start_date, end_date))
-        rows = cursor.fetchall()
-        # Convert to a dict: {'2025-12-25': False, ...}
-        return {row[0]: bool(row[1]) for row in rows}
-
+        if (year, month) not in self._fest_cache:
+            start_date, end_date = self._month_bounds(year, month)
+            cursor = self.conn.cursor()
+            cursor.execute('SELECT date, is_working_day FROM festivities WHERE date >= ? AND date < ?',
+                        (start_date, end_date))
+            rows = cursor.fetchall()
+            # Convert to a dict: {'2025-12-25': False, ...}
+            self._fest_cache[(year, month)] = {row[0]: bool(row[1]) for row in rows}
+        return self._fest_cache[(year, month)]
+
+
+    # ----- Month Prefetch -----
+    def get_month_bundle(self, year, month):
+        """
+        Fetch everything the schedule view needs for one month (employees,
+        shifts, absences, festivities) under the lock, so callers get one
+        consistent snapshot instead of four separate round-trips.
+        """
+        with self.lock:
+            return {
+                "employees": self.get_employees(),
+                "shifts": self.get_shifts_for_month(year, month),
+                "absences": self.get_absences_for_month(year, month),
+                "festivities": self.get_festivities_for_month(year, month),
+            }
 
     # ----- Settings Operations -----
     def get_setting(self, key):
-        cursor = self.conn.cursor()
-        cursor.execute("SELECT value FROM settings WHERE key=?", (key,))
-        row = cursor.fetchone()
-        return row[0] if row else None
+        return self.get_all_settings().get(key)
 
     def set_setting(self, key, value):
-        cursor = self.conn.cursor()
-        cursor.execute("UPDATE settings SET value=? WHERE key=?", (str(value), key))
-        self.conn.commit()
+        with self.lock, self.conn:
+            self.conn.execute("UPDATE settings SET value=? WHERE key=?", (str(value), key))
+        if self._settings_cache is not None:
+            self._settings_cache[key] = str(value)
+        self._stats_dirty = True
+
+    def set_settings(self, mapping):
+        """Write several settings in one transaction instead of one commit per key."""
+        rows = [(key, str(value)) for key, value in mapping.items()]
+        with self.lock, self.conn:
+            self.conn.executemany('''INSERT INTO settings (key, value) VALUES (?, ?)
+                                     ON CONFLICT(key) DO UPDATE SET value=excluded.value''', rows)
+        if self._settings_cache is not None:
+            self._settings_cache.update(rows)
+        self._stats_dirty = True
 
     def get_all_settings(self):
-        cursor = self.conn.cursor()
-        cursor.execute("SELECT key, value FROM settings")
-        rows = cursor.fetchall()
-        return {key: value for key, value in rows}
-    
+        if self._settings_cache is None:
+            rows = self.conn.execute("SELECT key, value FROM settings").fetchall()
+            self._settings_cache = {key: value for key, value in rows}
+        return self._settings_cache
+
+    def get_shift_durations(self):
+        """Shift durations in hours as {"Morning": int, ...}."""
+        settings = self.get_all_settings()
+        return {
+            "Morning": int(settings["duration_morning"]),
+            "Afternoon": int(settings["duration_afternoon"]),
+            "Night": int(settings["duration_night"])
+        }
+
+    def get_staffing(self):
+        """Employees needed per shift as {"Morning": int, ...}."""
+        settings = self.get_all_settings()
+        return {
+            "Morning": int(settings["staffing_morning"]),
+            "Afternoon": int(settings["staffing_afternoon"]),
+            "Night": int(settings["staffing_night"])
+        }
+
+    def get_month_stats(self, year, month):
+        """
+        Per-employee shift/hour totals for a month, split into normal and
+        festive (non-working festivity) days, aggregated in one SQL query
+        instead of loading every shift and merging in Python.
+        Returns rows of (id, name, target_hours, accumulated_hours,
+        normal_shifts, normal_hours, fest_shifts, fest_hours); employees
+        with no shifts appear with zero counts.
+        """
+        first_day, next_month = self._month_bounds(year, month)
+        d = self.get_shift_durations()
+        # Shift durations live in settings, so inline them as a CASE.
+        dur = ("CASE s.shift_type WHEN 'Morning' THEN {} WHEN 'Afternoon' THEN {} "
+               "WHEN 'Night' THEN {} ELSE 8 END").format(
+                   d["Morning"], d["Afternoon"], d["Night"])
+        fest = "f.is_working_day = 0"
+        normal = "s.id IS NOT NULL AND (f.is_working_day IS NULL OR f.is_working_day != 0)"
+        # festivities(date) carries no UNIQUE constraint, so the join goes
+        # through a deduplicated subquery: a duplicate date row must not
+        # count the same shift twice. MIN() makes any non-working entry win.
+        cursor = self.conn.execute(f'''
+            SELECT e.id, e.name, e.target_hours, e.accumulated_hours,
+                   COALESCE(SUM(CASE WHEN {normal} THEN 1 ELSE 0 END), 0),
+                   COALESCE(SUM(CASE WHEN {normal} THEN {dur} ELSE 0 END), 0),
+                   COALESCE(SUM(CASE WHEN {fest} THEN 1 ELSE 0 END), 0),
+                   COALESCE(SUM(CASE WHEN {fest} THEN {dur} ELSE 0 END), 0)
+            FROM employees e
+            LEFT JOIN shifts s ON s.employee_id = e.id
+                              AND s.shift_date >= ? AND s.shift_date < ?
+            LEFT JOIN (SELECT date, MIN(is_working_day) AS is_working_day
+                       FROM festivities GROUP BY date) f ON f.date = s.shift_date
+            GROUP BY e.id
+            ORDER BY e.id
+        ''', (first_day, next_month))
+        return cursor.fetchall()
+
     # ----- Schedule Operations -----
     def save_schedule(self, year, month, schedule_json):
-        cursor = self.conn.cursor()
-        cursor.execute("INSERT OR REPLACE INTO schedules (year, month, schedule) VALUES (?, ?, ?)",
-                       (year, month, schedule_json))
-        self.conn.commit()
-        
+        with self.lock, self.conn:
+            self.conn.execute("INSERT OR REPLACE INTO schedules (year, month, schedule) VALUES (?, ?, ?)",
+                              (year, month, schedule_json))
+
     def get_schedule(self, year, month):
-        cursor = self.conn.cursor()
-        cursor.execute("SELECT schedule FROM schedules WHERE year=? AND month=?", (year, month))
-        row = cursor.fetchone()
+        row = self.conn.execute("SELECT schedule FROM schedules WHERE year=? AND month=?",
+                                (year, month)).fetchone()
         return json.loads(row[0]) if row else None
-    
+
     def delete_schedule_snapshot(self, year, month):
-        cursor = self.conn.cursor()
-        cursor.execute("DELETE FROM schedules WHERE year=? AND month=?", (year, month))
-        self.conn.commit()
+        with self.lock, self.conn:
+            self.conn.execute("DELETE FROM schedules WHERE year=? AND month=?", (year, month))
 
 
     # ----- Statistics Operations -----
@@ -267,68 +556,60 @@ class DatabaseManager:
         calculate the extra hours worked (total_hours - target_hours).
         Then update the employee's accumulated_hours to reflect the extra hours.
         (This method recalculates from scratch for all completed months.)
+        Skipped entirely when nothing affecting the totals (shifts,
+        employees, settings) has changed since the last run.
         """
-        cursor = self.conn.cursor()
-        today = datetime.date.today()
-
-        # Get all shifts with a date on or before today.
-        cursor.execute('''
-            SELECT employee_id, shift_date, shift_type FROM shifts 
-            WHERE shift_date <= ?
-        ''', (today.strftime("%Y-%m-%d"),))
-        shifts = cursor.fetchall()
-
-        # Get shift durations from settings.
-        duration_morning = int(self.get_setting("duration_morning"))
-        duration_afternoon = int(self.get_setting("duration_afternoon"))
-        duration_night = int(self.get_setting("duration_night"))
-        shift_duration_map = {
-            "Morning": duration_morning,
-            "Afternoon": duration_afternoon,
-            "Night": duration_night
-        }
-
-        # Group shifts by employee and by month.
-        # Use a dict with keys (employee_id, year, month) and sum hours.
-        worked = {}
-        for employee_id, shift_date, shift_type in shifts:
-            dt = datetime.datetime.strptime(shift_date, "%Y-%m-%d").date()
-            key = (employee_id, dt.year, dt.month)
-            worked.setdefault(key, 0)
-            worked[key] += shift_duration_map.get(shift_type, 8)
-
-        # For each employee, sum the extra hours from every complete month.
-        # A month is considered complete if its last day is before today.
-        extra_hours_by_emp = {}
-        for (employee_id, year, month), total_hours in worked.items():
-            # Compute last day of the month.
-            if month == 12:
-                next_month = datetime.date(year + 1, 1, 1)
-            else:
-                next_month = datetime.date(year, month + 1, 1)
-            last_day_of_month = next_month - datetime.timedelta(days=1)
-
-            if last_day_of_month < today:
-                # Get the target hours for the employee.
-                cursor.execute("SELECT target_hours FROM employees WHERE id=?", (employee_id,))
-                result = cursor.fetchone()
-                if result:
-                    target_hours = result[0]
-                    extra = total_hours - target_hours
-                    if extra > 0:
-                        extra_hours_by_emp.setdefault(employee_id, 0)
-                        extra_hours_by_emp[employee_id] += extra
-
-        # Now update each employee's accumulated_hours.
-        # For simplicity, we set accumulated_hours equal to the computed extra hours.
-        for employee_id, extra in extra_hours_by_emp.items():
-            cursor.execute("UPDATE employees SET accumulated_hours=? WHERE id=?", (extra, employee_id))
-        self.conn.commit()
+        # Hold the lock across the whole read-compute-write cycle (like
+        # get_month_bundle does for its reads): the SELECT must not see a
+        # worker's half-replaced month, and _stats_dirty may only be
+        # cleared for the exact state that was read.
+        with self.lock:
+            if not self._stats_dirty:
+                return
+            durations = self.get_shift_durations()
+
+            # A month is complete once today is past its last day, i.e. every
+            # shift strictly before the first of the current month counts.
+            # SQLite does the per-(employee, month) grouping and hour sums in
+            # one pass; no shift rows or date parsing ever reach Python.
+            cutoff = datetime.date.today().replace(day=1).strftime("%Y-%m-%d")
+            cursor = self.conn.execute('''
+                SELECT s.employee_id,
+                       SUM(CASE s.shift_type WHEN 'Morning' THEN ? WHEN 'Afternoon' THEN ?
+                           WHEN 'Night' THEN ? ELSE 8 END) AS total_hours,
+                       e.target_hours
+                FROM shifts s JOIN employees e ON e.id = s.employee_id
+                WHERE s.shift_date < ?
+                GROUP BY s.employee_id, substr(s.shift_date, 1, 7)
+            ''', (durations["Morning"], durations["Afternoon"], durations["Night"], cutoff))
+
+            # Sum the extra hours (hours beyond target) per employee.
+            extra_hours_by_emp = {}
+            for employee_id, total_hours, target_hours in cursor:
+                extra = total_hours - target_hours
+                if extra > 0:
+                    extra_hours_by_emp.setdefault(employee_id, 0)
+                    extra_hours_by_emp[employee_id] += extra
+
+            # Now update each employee's accumulated_hours.
+            # For simplicity, we set accumulated_hours equal to the computed extra hours.
+            if extra_hours_by_emp:
+                with self.conn:
+                    self.conn.executemany("UPDATE employees SET accumulated_hours=? WHERE id=?",
+                                          [(extra, emp_id) for emp_id, extra in extra_hours_by_emp.items()])
+                self._employees_cache = None
+            self._stats_dirty = False
 
 
 # =============================================================================
 # Employee Dialog (for Adding/Editing)
 # =============================================================================
+# Combobox labels <-> stored preference values for EmployeeDialog; one
+# shared table instead of substring checks scattered through the dialog.
+_PREF_MAP = {"Avoid (0)": 0, "Neutral (1)": 1, "Prefer (2)": 2}
+_PREF_LABELS = {value: label for label, value in _PREF_MAP.items()}
+
+
 class EmployeeDialog(tk.Toplevel):
     def __init__(self, master, title="Add Employee", employee=None, default_target=None):
         super().__init__(master)
@@ -361,8 +642,8 @@ class EmployeeDialog(tk.Toplevel):
             tk.Label(self, text=f"{shift} Preference:").pack(pady=5)
             var = tk.StringVar()
             self.pref_vars[shift] = var
-            combo = ttk.Combobox(self, textvariable=var, 
-                                 values=["Avoid (0)", "Neutral (1)", "Prefer (2)"],
+            combo = ttk.Combobox(self, textvariable=var,
+                                 values=list(_PREF_MAP),
                                  state="readonly")
             combo.pack()
             combo.current(1)
@@ -375,12 +656,7 @@ class EmployeeDialog(tk.Toplevel):
             self.accum_entry.insert(0, str(self.employee["accumulated_hours"]))
             for shift in self.shift_types:
                 pref_value = self.employee["preferences"].get(shift, 1)
-                if pref_value == 0:
-                    self.pref_vars[shift].set("Avoid (0)")
-                elif pref_value == 2:
-                    self.pref_vars[shift].set("Prefer (2)")
-                else:
-                    self.pref_vars[shift].set("Neutral (1)")
+                self.pref_vars[shift].set(_PREF_LABELS.get(pref_value, "Neutral (1)"))
 
         tk.Button(self, text="OK", command=self.on_ok).pack(pady=10)
         tk.Button(self, text="Cancel", command=self.destroy).pack()
@@ -396,15 +672,8 @@ class EmployeeDialog(tk.Toplevel):
             target_hours = int(target_hours_str)
             accum_str = self.accum_entry.get().strip()
             accumulated_hours = int(accum_str) if accum_str else 0
-            preferences = {}
-            for shift in self.shift_types:
-                text = self.pref_vars[shift].get()
-                if "Avoid" in text:
-                    preferences[shift] = 0
-                elif "Prefer" in text:
-                    preferences[shift] = 2
-                else:
-                    preferences[shift] = 1
+            preferences = {shift: _PREF_MAP.get(self.pref_vars[shift].get(), 1)
+                           for shift in self.shift_types}
             self.result = {
                 "name": name,
                 "target_hours": target_hours,
@@ -424,11 +693,21 @@ class EmployeeTab(tk.Frame):
         self.db_manager = db_manager
 
         columns = ("id", "name", "target_hours", "accumulated_hours", "preferences")
-        self.tree = ttk.Treeview(self, columns=columns, show="headings", selectmode="browse")
-        for col in columns:
-            self.tree.heading(col, text=col.title())
-        self.tree.column("id", width=30)
-        self.tree.pack(fill=tk.BOTH, expand=True, pady=10)
+        if Sheet:
+            # tksheet only redraws the visible rows, so it stays responsive
+            # with large rosters where Treeview repaints everything.
+            self.sheet = Sheet(self, headers=[col.title() for col in columns], height=300)
+            self.sheet.pack(fill=tk.BOTH, expand=True, pady=10)
+            # Selection/navigation only: the full binding set would allow
+            # in-sheet edits and row inserts/deletes that never reach the
+            # database and silently vanish on the next refresh.
+            self.sheet.enable_bindings("single_select", "row_select", "arrowkeys")
+        else:
+            self.tree = ttk.Treeview(self, columns=columns, show="headings", selectmode="browse")
+            for col in columns:
+                self.tree.heading(col, text=col.title())
+            self.tree.column("id", width=30)
+            self.tree.pack(fill=tk.BOTH, expand=True, pady=10)
 
         btn_frame = tk.Frame(self)
         btn_frame.pack(pady=10)
@@ -438,35 +717,67 @@ class EmployeeTab(tk.Frame):
 
         self.refresh_tree()
 
+    @staticmethod
+    def employee_row(emp):
+        pref_str = ", ".join([f"{k}:{v}" for k, v in emp["preferences"].items()])
+        return (emp["id"], emp["name"], emp["target_hours"], emp["accumulated_hours"], pref_str)
+
     def refresh_tree(self):
-        for row in self.tree.get_children():
-            self.tree.delete(row)
-        employees = self.db_manager.get_employees()
-        for emp in employees:
-            pref_str = ", ".join([f"{k}:{v}" for k, v in emp["preferences"].items()])
-            self.tree.insert("", "end", values=(emp["id"], emp["name"], emp["target_hours"],
-                                                 emp["accumulated_hours"], pref_str))
+        # Display rows come back from SQL already formatted (printf builds
+        # the preferences string), same shape as employee_row produces.
+        rows = self.db_manager.get_employees_for_display()
+        if Sheet:
+            # One array swap instead of N insert calls.
+            self.sheet.set_sheet_data([list(row) for row in rows])
+            return
+        # Diff against what the tree already shows (iid == employee id):
+        # existing rows are updated in place, new ones inserted, stale ones
+        # removed, instead of a full delete + re-insert of every row.
+        stale = set(self.tree.get_children())
+        for row in rows:
+            iid = str(row[0])
+            if iid in stale:
+                stale.discard(iid)
+                self.tree.item(iid, values=tuple(row))
+            else:
+                # Stable iid per employee so add/edit/delete can update a
+                # single row instead of rebuilding the whole tree.
+                self.tree.insert("", "end", iid=iid, values=tuple(row))
+        if stale:
+            self.tree.delete(*stale)
+
+    def selected_employee_id(self):
+        if Sheet:
+            selected = self.sheet.get_currently_selected()
+            if not selected:
+                return None
+            return self.sheet.get_cell_data(selected.row, 0)
+        selected = self.tree.selection()
+        if not selected:
+            return None
+        return self.tree.item(selected[0])["values"][0]
 
     def add_employee(self):
         default_target = self.db_manager.get_setting("default_target_hours")
         dialog = EmployeeDialog(self, title="Add Employee", default_target=default_target)
         self.wait_window(dialog)
         if dialog.result:
-            self.db_manager.add_employee(dialog.result["name"],
-                                         dialog.result["target_hours"],
-                                         dialog.result["accumulated_hours"],
-                                         dialog.result["preferences"])
-            self.refresh_tree()
+            new_id = self.db_manager.add_employee(dialog.result["name"],
+                                                  dialog.result["target_hours"],
+                                                  dialog.result["accumulated_hours"],
+                                                  dialog.result["preferences"])
+            if Sheet:
+                self.refresh_tree()
+            else:
+                emp = dict(dialog.result, id=new_id)
+                self.tree.insert("", "end", iid=str(new_id), values=self.employee_row(emp))
 
     def edit_employee(self):
-        selected = self.tree.selection()
-        if not selected:
+        emp_id = self.selected_employee_id()
+        if emp_id is None:
             messagebox.showwarning("Select Employee", "Please select an employee to edit.")
             return
-        item = self.tree.item(selected[0])
-        emp_id = item["values"][0]
-        employees = self.db_manager.get_employees()
-        employee = next((e for e in employees if e["id"] == emp_id), None)
+        employee = self.db_manager.get_employee(emp_id)
         if employee:
             dialog = EmployeeDialog(self, title="Edit Employee", employee=employee)
             self.wait_window(dialog)
@@ -476,22 +787,47 @@ class EmployeeTab(tk.Frame):
                                                 dialog.result["target_hours"],
                                                 dialog.result["accumulated_hours"],
                                                 dialog.result["preferences"])
-                self.refresh_tree()
+                if Sheet:
+                    self.refresh_tree()
+                else:
+                    emp = dict(dialog.result, id=emp_id)
+                    self.tree.item(str(emp_id), values=self.employee_row(emp))
 
     def delete_employee(self):
-        selected = self.tree.selection()
-        if not selected:
+        emp_id = self.selected_employee_id()
+        if emp_id is None:
             messagebox.showwarning("Select Employee", "Please select an employee to delete.")
             return
-        item = self.tree.item(selected[0])
-        emp_id = item["values"][0]
         if messagebox.askyesno("Confirm Delete", "Are you sure you want to delete this employee?"):
             self.db_manager.delete_employee(emp_id)
-            self.refresh_tree()
+            if Sheet:
+                self.refresh_tree()
+            else:
+                self.tree.delete(str(emp_id))
 
 # =============================================================================
 # Schedule Tab
 # =============================================================================
+# Shown for shift slots that could not be staffed.
+VACANT = "(vacant)"
+
+
+class Emp:
+    """
+    Lightweight per-employee scheduling state. `remaining` is the hours
+    still owed this month and is decremented directly as shifts are
+    assigned, so heap keys read a plain attribute instead of calling a
+    method that re-derives it.
+    """
+    __slots__ = ("id", "name", "preferences", "remaining")
+
+    def __init__(self, data):
+        self.id = data["id"]
+        self.name = data["name"]
+        self.preferences = data["preferences"]
+        self.remaining = data["target_hours"] - data["accumulated_hours"]
+
+
 class ScheduleTab(tk.Frame):
     def __init__(self, master, db_manager):
         super().__init__(master)
@@ -517,9 +853,17 @@ class ScheduleTab(tk.Frame):
         self.next_button = tk.Button(control_frame, text=">", command=self.next_month)
         self.next_button.pack(side=tk.LEFT, padx=5)
         
-        tk.Button(control_frame, text="Generate Schedule", command=self.generate_schedule).pack(side=tk.LEFT, padx=10)
+        self.generate_button = tk.Button(control_frame, text="Generate Schedule", command=self.generate_schedule)
+        self.generate_button.pack(side=tk.LEFT, padx=10)
         tk.Button(control_frame, text="Clear Schedule", command=self.clear_schedule).pack(side=tk.LEFT, padx=5)
-        tk.Button(control_frame, text="Update Schedule", command=self.update_schedule).pack(side=tk.LEFT, padx=5)
+        self.update_button = tk.Button(control_frame, text="Update Schedule", command=self.update_schedule)
+        self.update_button.pack(side=tk.LEFT, padx=5)
+        # Guards against launching a second generate/update while a worker
+        # thread is still running the previous one.
+        self._busy = False
+        # One reused cursor for the cell-edit handlers (main thread only),
+        # instead of a fresh cursor per edit.
+        self._edit_cursor = self.db_manager.conn.cursor()
         tk.Label(control_frame, text="Filter by Employee:").pack(side=tk.LEFT, padx=5)
         self.employee_filter_var = tk.StringVar()
         
@@ -551,6 +895,76 @@ class ScheduleTab(tk.Frame):
         # Load the saved schedule (if any) for the current month.
         self.load_saved_schedule()
 
+    @staticmethod
+    def _pop_candidates(heap, needed, current_date, absent):
+        """
+        Pop up to `needed` non-absent employees off a candidate heap.
+        Entries whose remaining hours changed since they were pushed are
+        lazily re-keyed; absent employees are set aside and restored so
+        they stay available for other days.
+        """
+        picked = []
+        set_aside = []
+        while heap and len(picked) < needed:
+            neg_pref, neg_rem, emp_id, e = heapq.heappop(heap)
+            if -neg_rem != e.remaining:
+                # Stale entry: re-push with the current key.
+                heapq.heappush(heap, (neg_pref, -e.remaining, emp_id, e))
+                continue
+            if (emp_id, current_date) in absent:
+                set_aside.append((neg_pref, neg_rem, emp_id, e))
+                continue
+            picked.append(e)
+        for entry in set_aside:
+            heapq.heappush(heap, entry)
+        return picked
+
+    @staticmethod
+    def _pop_best(heap, score_fn, reject_fn, min_score=None):
+        """
+        Pop the best candidate off a lazy (-score, emp_id) heap. Stale
+        entries are re-keyed on pop, rejected candidates (absent, already
+        assigned) are set aside and restored, and None is returned when
+        the best live score does not beat min_score - nothing below it in
+        the heap can either.
+        """
+        set_aside = []
+        found = None
+        while heap:
+            neg_score, emp_id = heapq.heappop(heap)
+            score = score_fn(emp_id)
+            if -neg_score != score:
+                heapq.heappush(heap, (-score, emp_id))
+                continue
+            if min_score is not None and score <= min_score:
+                heapq.heappush(heap, (neg_score, emp_id))
+                break
+            if reject_fn(emp_id):
+                set_aside.append((neg_score, emp_id))
+                continue
+            found = emp_id
+            break
+        for entry in set_aside:
+            heapq.heappush(heap, entry)
+        return found
+
+    @staticmethod
+    def build_absent_set(absences_list, first_day, last_day):
+        """
+        Expand absence date ranges (clamped to the month) into a set of
+        (employee_id, date) pairs, so absence checks in the scheduling
+        loops are O(1) hash lookups.
+        """
+        absent = set()
+        one_day = datetime.timedelta(days=1)
+        for a in absences_list:
+            day = max(a["start_date"], first_day)
+            end = min(a["end_date"], last_day)
+            while day <= end:
+                absent.add((a["employee_id"], day))
+                day += one_day
+        return absent
+
     def clear_schedule(self):
         # Use the current_date attribute from the arrow menu navigation.
         year = self.current_date.year
@@ -570,174 +984,200 @@ class ScheduleTab(tk.Frame):
         if Sheet:
             self.sheet.set_sheet_data([])
         else:
-            for row in self.tree.get_children():
-                self.tree.delete(row)
+            self.tree.delete(*self.tree.get_children())
 
         messagebox.showinfo("Success", "Schedule for the selected month has been cleared and statistics updated.")
 
-    def generate_schedule(self):
-        # Use self.current_date (the date shown on the label)
-        year = self.current_date.year
-        month = self.current_date.month
+    def _compute_month_schedule(self, year, month, bundle, staffing, shift_durations):
+        """
+        Pure computation of a month's assignments - no widgets, no database
+        writes - so it can run anywhere (including a worker thread).
+        Returns (schedule dict, shift rows for bulk insert, warnings).
+        """
+        first_day = datetime.date(year, month, 1)
+        if month == 12:
+            next_month = datetime.date(year + 1, 1, 1)
+        else:
+            next_month = datetime.date(year, month + 1, 1)
+        days = (next_month - first_day).days
 
-        try:
-            # Clear existing SHIFT records in DB for this month
-            self.db_manager.clear_shifts_for_month(year, month)
+        # Expand absences into a set of (employee_id, date) pairs so the
+        # per-(day, shift) eligibility check is a single hash lookup
+        # instead of a scan over that employee's absence ranges.
+        absent = self.build_absent_set(bundle["absences"], first_day, next_month - datetime.timedelta(days=1))
 
-            # Grab employees
-            employees_data = self.db_manager.get_employees()
-            if not employees_data:
-                messagebox.showwarning("No Employees", "No employees available for scheduling.")
-                return
+        # Festivities for the month => {date_str: True/False} => True = working day, False = non-working
+        festivities = bundle["festivities"]
 
-            # Grab shift "staffing" (i.e. how many employees needed per shift)
-            staffing = {
-                "Morning": int(self.db_manager.get_setting("staffing_morning")),
-                "Afternoon": int(self.db_manager.get_setting("staffing_afternoon")),
-                "Night": int(self.db_manager.get_setting("staffing_night"))
-            }
+        employees = [Emp(e) for e in bundle["employees"]]
 
-            # Grab shift durations
-            shift_durations = {
-                "Morning": int(self.db_manager.get_setting("duration_morning")),
-                "Afternoon": int(self.db_manager.get_setting("duration_afternoon")),
-                "Night": int(self.db_manager.get_setting("duration_night"))
-            }
+        # One candidate heap per shift type, keyed so the best candidate
+        # (highest preference, then most remaining hours) pops first.
+        # Only the few employees assigned per shift change key, so
+        # popping the top `needed` beats re-sorting the whole roster
+        # for every (day, shift).
+        heaps = {}
+        for shift in self.shift_types:
+            heap = [(-e.preferences.get(shift, 1), -e.remaining, e.id, e) for e in employees]
+            heapq.heapify(heap)
+            heaps[shift] = heap
 
-            # Load absences for the month, build a helper to check if absent
-            absences_list = self.db_manager.get_absences_for_month(year, month)
-            absences_by_employee = {}
-            for a in absences_list:
-                absences_by_employee.setdefault(a["employee_id"], []).append(a)
-
-            def is_employee_absent(emp_id, date_obj):
-                if emp_id not in absences_by_employee:
-                    return False
-                for absence in absences_by_employee[emp_id]:
-                    if absence["start_date"] <= date_obj <= absence["end_date"]:
-                        return True
-                return False
-
-            # Load festivities for the month => {date_str: True/False} => True = working day, False = non-working
-            festivities = self.db_manager.get_festivities_for_month(year, month)
-
-            # Build a lightweight employee class to track assigned_hours
-            class Emp:
-                def __init__(self, data):
-                    self.id = data["id"]
-                    self.name = data["name"]
-                    self.target_hours = data["target_hours"]
-                    self.accumulated_hours = data["accumulated_hours"]
-                    self.preferences = data["preferences"]
-                    self.assigned_hours = 0  # For newly assigned shifts this month
-
-                def remaining_hours(self):
-                    return (self.target_hours - self.accumulated_hours) - self.assigned_hours
-
-            employees = [Emp(e) for e in employees_data]
-
-            # Compute how many days in the selected month
-            first_day = datetime.date(year, month, 1)
-            if month == 12:
-                next_month = datetime.date(year + 1, 1, 1)
-            else:
-                next_month = datetime.date(year, month + 1, 1)
-            days = (next_month - first_day).days
+        # Prepare a dictionary for the schedule => { date_str: {shift_type: [employee_names...] } }
+        schedule = {}
+        warnings_list = []
+        shift_rows = []  # (date_str, shift_type, employee_id) collected for one bulk insert
+
+        # Precompute each day's date object and ISO string once; strftime in
+        # particular is expensive enough to matter when repeated per day.
+        month_days = [(datetime.date(year, month, day), f"{year:04d}-{month:02d}-{day:02d}")
+                      for day in range(1, days + 1)]
+
+        for current_date, date_str in month_days:
+            # Check if it's a festivity *and* non-working day => skip assignment
+            if date_str in festivities and festivities[date_str] == False:
+                # Non-working festivity => store empty day, no shifts assigned
+                schedule[date_str] = {}
+                continue
 
-            # Prepare a dictionary for the schedule => { date_str: {shift_type: [employee_names...] } }
-            schedule = {}
-            warnings_list = []
+            # Otherwise, proceed with normal assignment.
+            # Eligibility only depends on the day, so filter once here
+            # rather than once per shift type.
+            eligible = [e for e in employees if (e.id, current_date) not in absent]
+            schedule[date_str] = {}
+            for shift in self.shift_types:
+                needed = staffing.get(shift, 0)
+                if not eligible:
+                    warnings_list.append(f"No eligible employees for {shift} on {date_str}")
+                    schedule[date_str][shift] = []
+                    continue
 
-            for day in range(1, days + 1):
-                current_date = datetime.date(year, month, day)
-                date_str = current_date.strftime("%Y-%m-%d")
+                # Pop the best `needed` present candidates off this
+                # shift's heap (highest preference, most remaining hours).
+                picked = self._pop_candidates(heaps[shift], needed, current_date, absent)
+
+                # Understaffed => leave the missing slots explicitly vacant.
+                # (The old fallback silently assigned the top candidate twice
+                # to the same shift, double-counting their hours and writing
+                # duplicate shift rows.)
+                if len(picked) < needed:
+                    warnings_list.append(
+                        f"Not enough employees for {shift} on {date_str}; "
+                        f"{needed - len(picked)} slot(s) left vacant")
+
+                # Now record their assignment in the local schedule
+                assigned_names = []
+                for e in picked:
+                    e.remaining -= shift_durations.get(shift, 8)
+                    shift_rows.append((date_str, shift, e.id))
+                    assigned_names.append(e.name)
+                assigned_names.extend([VACANT] * (needed - len(picked)))
+
+                # Re-insert the picked employees with their updated keys.
+                for e in picked:
+                    heapq.heappush(heaps[shift], (-e.preferences.get(shift, 1), -e.remaining, e.id, e))
+
+                # Put the assigned names in the schedule dictionary
+                schedule[date_str][shift] = assigned_names
+
+        return schedule, shift_rows, warnings_list
+
+    def _set_busy(self, busy):
+        """Toggle the worker-in-progress flag and the buttons that start one."""
+        self._busy = busy
+        state = tk.DISABLED if busy else tk.NORMAL
+        self.generate_button.config(state=state)
+        self.update_button.config(state=state)
+
+    def _schedule_op_done(self, kind, title, message):
+        """Runs on the Tk main loop: re-enable the buttons and report."""
+        self._set_busy(False)
+        getattr(messagebox, "show" + kind)(title, message)
 
-                # Check if it's a festivity *and* non-working day => skip assignment
-                if date_str in festivities and festivities[date_str] == False:
-                    # Non-working festivity => store empty day, no shifts assigned
-                    schedule[date_str] = {}
-                    continue
+    def generate_schedule(self):
+        # Use self.current_date (the date shown on the label)
+        year = self.current_date.year
+        month = self.current_date.month
 
-                # Otherwise, proceed with normal assignment
-                schedule[date_str] = {}
-                for shift in self.shift_types:
-                    needed = staffing.get(shift, 0)
-                    # Filter employees who are NOT absent
-                    eligible = [e for e in employees if not is_employee_absent(e.id, current_date)]
-                    if not eligible:
-                        warnings_list.append(f"No eligible employees for {shift} on {date_str}")
-                        schedule[date_str][shift] = []
-                        continue
+        if self._busy:
+            return
+        # Generation only reads/writes the database and local data, so run
+        # it in a worker thread and keep the Tk main loop responsive; the
+        # result is marshalled back onto the main loop via after().
+        self._set_busy(True)
+        threading.Thread(target=self._generate_schedule_worker, args=(year, month), daemon=True).start()
 
-                    # Sort by (preference, remaining_hours). Higher preference => 2, normal => 1, avoid => 0
-                    # We also want employees with more 'remaining_hours' up front
-                    # so (pref, remaining_hours) in descending order
-                    def sort_key(e):
-                        pref = e.preferences.get(shift, 1)  # default is 1 if not found
-                        return (pref, e.remaining_hours())
-
-                    sorted_candidates = sorted(eligible, key=sort_key, reverse=True)
-
-                    # If fewer unique candidates than needed, we fill with top candidate again => under-staffed warning
-                    if len(sorted_candidates) < needed:
-                        warnings_list.append(f"Not enough employees for {shift} on {date_str}; re-using top candidate")
-                        # We can do something like:
-                        extra_needed = needed - len(sorted_candidates)
-                        assigned = sorted_candidates + [sorted_candidates[0]] * extra_needed
-                    else:
-                        assigned = sorted_candidates[:needed]
-
-                    # Now record their assignment in DB and local schedule
-                    assigned_names = []
-                    for e in assigned:
-                        e.assigned_hours += shift_durations.get(shift, 8)
-                        # Insert shift record in DB
-                        self.db_manager.add_shift(date_str, shift, e.id)
-                        assigned_names.append(e.name)
-
-                    # Put the assigned names in the schedule dictionary
-                    schedule[date_str][shift] = assigned_names
-
-            # Build the data for displaying in tksheet or treeview
-            sheet_data = []
-            for date_str in sorted(schedule.keys()):
-                row = [date_str]
-                for shift in self.shift_types:
-                    emp_list = schedule[date_str].get(shift, [])
-                    row.append(", ".join(emp_list))
-                sheet_data.append(row)
+    def _generate_schedule_worker(self, year, month):
+        try:
+            # Grab everything the generator needs in one snapshot.
+            bundle = self.db_manager.get_month_bundle(year, month)
+            employees_data = bundle["employees"]
+            if not employees_data:
+                self.after(0, self._schedule_op_done, "warning",
+                           "No Employees", "No employees available for scheduling.")
+                return
 
-            # Update the UI
-            if Sheet:
-                self.sheet.set_sheet_data(sheet_data)
-                # Optionally highlight working vs. non-working festivity rows
-                self.highlight_festivity_rows(sheet_data, festivities)
-            else:
-                # Treeview fallback
-                for row in self.tree.get_children():
-                    self.tree.delete(row)
-                for row in sheet_data:
-                    self.insert_festivity_treeview_row(row, festivities)
+            # Staffing (employees needed per shift) and shift durations.
+            staffing = self.db_manager.get_staffing()
+            shift_durations = self.db_manager.get_shift_durations()
 
-            # Show any warnings or success
-            if warnings_list:
-                msg = "\n".join(warnings_list)
-                messagebox.showwarning("Warning", f"Some issues occurred:\n{msg}")
-            else:
-                messagebox.showinfo("Success", "Schedule generated successfully.")
+            schedule, shift_rows, warnings_list = self._compute_month_schedule(
+                year, month, bundle, staffing, shift_durations)
+
+            # Write the whole month in one transaction (also clears the old
+            # shift records for the month).
+            self.db_manager.replace_shifts_for_month(year, month, shift_rows)
 
             # Save the schedule to the 'schedules' table
             self.db_manager.save_schedule(year, month, json.dumps(schedule))
 
+            self.after(0, self._apply_generated_schedule,
+                       schedule, bundle["festivities"], warnings_list)
         except Exception as e:
-            messagebox.showerror("Error", f"Failed to generate schedule: {e}")
+            self.after(0, self._schedule_op_done, "error",
+                       "Error", f"Failed to generate schedule: {e}")
+
+    def _apply_generated_schedule(self, schedule, festivities, warnings_list):
+        # Build the data for displaying in tksheet or treeview, one row
+        # comprehension per day (tuple default avoids allocating empties).
+        sheet_data = [[date_str, *(", ".join(schedule[date_str].get(shift, ()))
+                                   for shift in self.shift_types)]
+                      for date_str in sorted(schedule)]
+
+        # Update the UI
+        if Sheet:
+            self.sheet.set_sheet_data(sheet_data)
+            # Optionally highlight working vs. non-working festivity rows
+            self.highlight_festivity_rows(sheet_data, festivities)
+        else:
+            # Treeview fallback
+            self.tree.delete(*self.tree.get_children())
+            for row in sheet_data:
+                self.insert_festivity_treeview_row(row, festivities)
+
+        # Show any warnings or success
+        if warnings_list:
+            msg = "\n".join(warnings_list)
+            self._schedule_op_done("warning", "Warning", f"Some issues occurred:\n{msg}")
+        else:
+            self._schedule_op_done("info", "Success", "Schedule generated successfully.")
 
     def update_schedule(self):
-        year = self.year_var.get()
-        month = self.month_var.get()
+        # Use self.current_date from the arrow navigation (the old
+        # year_var/month_var widgets no longer exist).
+        year = self.current_date.year
+        month = self.current_date.month
+        if self._busy:
+            return
+        # Same split as generate_schedule: the repair passes run in a
+        # worker thread, the display refresh runs back on the main loop.
+        self._set_busy(True)
+        threading.Thread(target=self._update_schedule_worker, args=(year, month), daemon=True).start()
+
+    def _update_schedule_worker(self, year, month):
         try:
             # Load current schedule records for the month.
-            current_shifts = self.db_manager.get_shifts_for_month(year, month)
+            bundle = self.db_manager.get_month_bundle(year, month)
+            current_shifts = bundle["shifts"]
             # Organize schedule: {date_str: {shift_type: [(shift_id, emp_id, emp_name), ...]}}
             schedule = {}
             for record in current_shifts:
@@ -745,7 +1185,7 @@ class ScheduleTab(tk.Frame):
                 schedule.setdefault(shift_date, {}).setdefault(shift_type, []).append((shift_id, emp_id, emp_name))
             
             # Load employee records and build a map.
-            employees_data = self.db_manager.get_employees()
+            employees_data = bundle["employees"]
             emp_map = {}
             for e in employees_data:
                 emp_map[e["id"]] = {
@@ -757,11 +1197,7 @@ class ScheduleTab(tk.Frame):
                 }
             
             # Load shift durations from settings.
-            shift_durations = {
-                "Morning": int(self.db_manager.get_setting("duration_morning")),
-                "Afternoon": int(self.db_manager.get_setting("duration_afternoon")),
-                "Night": int(self.db_manager.get_setting("duration_night"))
-            }
+            shift_durations = self.db_manager.get_shift_durations()
             
             # Compute current assigned hours per employee.
             for date_str, shifts in schedule.items():
@@ -770,19 +1206,6 @@ class ScheduleTab(tk.Frame):
                         if emp_id in emp_map:
                             emp_map[emp_id]["assigned_hours"] += shift_durations.get(shift, 8)
             
-            # Load absences for the month.
-            absences_list = self.db_manager.get_absences_for_month(year, month)
-            absences_by_emp = {}
-            for a in absences_list:
-                absences_by_emp.setdefault(a["employee_id"], []).append((a["start_date"], a["end_date"]))
-            def is_absent(emp_id, date_obj):
-                if emp_id not in absences_by_emp:
-                    return False
-                for (start, end) in absences_by_emp[emp_id]:
-                    if start <= date_obj <= end:
-                        return True
-                return False
-
             changes = 0
             # Determine the days in the month.
             first_day = datetime.date(year, month, 1)
@@ -792,48 +1215,67 @@ class ScheduleTab(tk.Frame):
                 next_month = datetime.date(year, month + 1, 1)
             days = (next_month - first_day).days
 
+            # Same O(1) absence lookup as generate_schedule, shared by both
+            # repair passes below.
+            absent = self.build_absent_set(bundle["absences"], first_day, next_month - datetime.timedelta(days=1))
+
+            # Reassignments are collected here and written in one
+            # transaction at the end instead of one commit per swap.
+            pending_updates = []
+
+            def remaining_for(cand_id):
+                cand = emp_map[cand_id]
+                return (cand["target_hours"] - cand["accumulated_hours"]) - cand["assigned_hours"]
+
+            def replacement_score(cand_id, shift):
+                return remaining_for(cand_id) + emp_map[cand_id]["preferences"].get(shift, 1) * 10
+
+            # Candidate heaps so each replacement search pops the best
+            # candidate in O(log N) instead of scanning every employee:
+            # one heap per shift for Pass 1 (score = remaining + preference
+            # weight) and one keyed on remaining hours for Pass 2. Entries
+            # whose score drifted are lazily re-keyed by _pop_best.
+            pass1_heaps = {}
+            for shift in self.shift_types:
+                heap = [(-replacement_score(cand_id, shift), cand_id) for cand_id in emp_map]
+                heapq.heapify(heap)
+                pass1_heaps[shift] = heap
+            pass2_heap = [(-remaining_for(cand_id), cand_id) for cand_id in emp_map]
+            heapq.heapify(pass2_heap)
+
+            # Build each day's date object and ISO string once and share the
+            # list between both passes, skipping days with no shifts up front.
+            day_list = [(datetime.date(year, month, day), f"{year:04d}-{month:02d}-{day:02d}")
+                        for day in range(1, days + 1)
+                        if f"{year:04d}-{month:02d}-{day:02d}" in schedule]
+
             # --- Pass 1: Fix assignments where the employee is absent ---
-            for day in range(1, days + 1):
-                current_date = datetime.date(year, month, day)
-                date_str = current_date.strftime("%Y-%m-%d")
-                if date_str not in schedule:
-                    continue
+            for current_date, date_str in day_list:
                 for shift in self.shift_types:
                     if shift not in schedule[date_str]:
                         continue
                     new_assignments = []
-                    # Get the list of employee IDs already assigned for this shift on this day.
-                    assigned_ids = [rec[1] for rec in schedule[date_str][shift]]
+                    # Employee IDs already assigned for this shift on this day.
+                    assigned_ids = {rec[1] for rec in schedule[date_str][shift]}
                     for (shift_id, emp_id, emp_name) in schedule[date_str][shift]:
-                        if is_absent(emp_id, current_date):
+                        if (emp_id, current_date) in absent:
                             # Look for a replacement candidate.
-                            candidate = None
-                            best_score = -1e9
-                            for cand_id, cand in emp_map.items():
-                                if is_absent(cand_id, current_date):
-                                    continue
-                                # Skip if already assigned on that shift.
-                                if cand_id in assigned_ids:
-                                    continue
-                                # Compute candidate's "remaining" work need.
-                                remaining = (cand["target_hours"] - cand["accumulated_hours"]) - cand["assigned_hours"]
-                                # Weight by preference (assume preference: 0=avoid, 1=neutral, 2=prefer).
-                                preference = cand["preferences"].get(shift, 1)
-                                score = remaining + (preference * 10)
-                                if score > best_score:
-                                    best_score = score
-                                    candidate = cand_id
+                            candidate = self._pop_best(
+                                pass1_heaps[shift],
+                                lambda cand_id: replacement_score(cand_id, shift),
+                                lambda cand_id: (cand_id, current_date) in absent or cand_id in assigned_ids)
                             if candidate is not None:
-                                # Update this shift in the database.
-                                cursor = self.db_manager.conn.cursor()
-                                cursor.execute("UPDATE shifts SET employee_id = ? WHERE id = ?", (candidate, shift_id))
-                                self.db_manager.conn.commit()
+                                pending_updates.append((candidate, shift_id))
                                 # Update assigned hours.
                                 emp_map[emp_id]["assigned_hours"] -= shift_durations.get(shift, 8)
                                 emp_map[candidate]["assigned_hours"] += shift_durations.get(shift, 8)
                                 # Replace the assignment.
+                                assigned_ids.discard(emp_id)
+                                assigned_ids.add(candidate)
                                 new_assignments.append((shift_id, candidate, emp_map[candidate]["name"]))
                                 changes += 1
+                                heapq.heappush(pass1_heaps[shift],
+                                               (-replacement_score(candidate, shift), candidate))
                             else:
                                 new_assignments.append((shift_id, emp_id, emp_name))
                         else:
@@ -841,68 +1283,69 @@ class ScheduleTab(tk.Frame):
                     schedule[date_str][shift] = new_assignments
             # --- Pass 2: Rebalance shifts (if an employee is over-assigned) ---
             # (Threshold here is set to –5 hours; adjust as needed.)
-            for day in range(1, days + 1):
-                current_date = datetime.date(year, month, day)
-                date_str = current_date.strftime("%Y-%m-%d")
-                if date_str not in schedule:
-                    continue
+            for current_date, date_str in day_list:
                 for shift in self.shift_types:
                     if shift not in schedule[date_str]:
                         continue
                     new_assignments = []
-                    assigned_ids = [rec[1] for rec in schedule[date_str][shift]]
+                    assigned_ids = {rec[1] for rec in schedule[date_str][shift]}
                     for (shift_id, emp_id, emp_name) in schedule[date_str][shift]:
                         # Compute remaining hours for this employee.
                         remaining = (emp_map[emp_id]["target_hours"] - emp_map[emp_id]["accumulated_hours"]) - emp_map[emp_id]["assigned_hours"]
                         if remaining < -5:  # if over-assigned by more than 5 hours
-                            # Look for an alternative candidate not assigned on this shift.
-                            candidate = None
-                            best_remaining = -1e9
-                            for cand_id, cand in emp_map.items():
-                                if is_absent(cand_id, current_date):
-                                    continue
-                                if cand_id in assigned_ids:
-                                    continue
-                                cand_remaining = (cand["target_hours"] - cand["accumulated_hours"]) - cand["assigned_hours"]
-                                if cand_remaining > best_remaining and cand_remaining > 0:
-                                    best_remaining = cand_remaining
-                                    candidate = cand_id
+                            # Look for an alternative candidate not assigned on
+                            # this shift; min_score=0 keeps the old "only take
+                            # candidates who still owe hours" rule.
+                            candidate = self._pop_best(
+                                pass2_heap,
+                                remaining_for,
+                                lambda cand_id: (cand_id, current_date) in absent or cand_id in assigned_ids,
+                                min_score=0)
                             if candidate is not None:
-                                cursor = self.db_manager.conn.cursor()
-                                cursor.execute("UPDATE shifts SET employee_id = ? WHERE id = ?", (candidate, shift_id))
-                                self.db_manager.conn.commit()
+                                pending_updates.append((candidate, shift_id))
                                 emp_map[emp_id]["assigned_hours"] -= shift_durations.get(shift, 8)
                                 emp_map[candidate]["assigned_hours"] += shift_durations.get(shift, 8)
+                                assigned_ids.discard(emp_id)
+                                assigned_ids.add(candidate)
                                 new_assignments.append((shift_id, candidate, emp_map[candidate]["name"]))
                                 changes += 1
+                                heapq.heappush(pass2_heap, (-remaining_for(candidate), candidate))
                             else:
                                 new_assignments.append((shift_id, emp_id, emp_name))
                         else:
                             new_assignments.append((shift_id, emp_id, emp_name))
                     schedule[date_str][shift] = new_assignments
 
-            # Rebuild the display data.
-            sheet_data = []
-            for date_str, shifts in sorted(schedule.items()):
-                row = [date_str]
-                for shift in self.shift_types:
-                    names = [rec[2] for rec in shifts.get(shift, [])]
-                    row.append(", ".join(names))
-                sheet_data.append(row)
-            if Sheet:
-                self.sheet.set_sheet_data(sheet_data)
-            else:
-                for row in self.tree.get_children():
-                    self.tree.delete(row)
-                for row in sheet_data:
-                    self.tree.insert("", "end", values=row)
-            messagebox.showinfo("Update Complete", f"Schedule updated. {changes} shift(s) changed.")
-        
+            # Apply every reassignment from both passes in one transaction.
+            if pending_updates:
+                self.db_manager.update_shift_assignments(pending_updates)
+
+            if changes == 0:
+                # Nothing moved: the current display and snapshot still match.
+                self.after(0, self._schedule_op_done, "info",
+                           "Update Complete", "Schedule updated. 0 shift(s) changed.")
+                return
+
             # Save the schedule (as JSON) into the database
             self.db_manager.save_schedule(year, month, json.dumps(schedule))
-            
+
+            self.after(0, self._apply_updated_schedule, schedule, changes)
         except Exception as e:
-            messagebox.showerror("Error", f"Failed to update schedule: {e}")
+            self.after(0, self._schedule_op_done, "error",
+                       "Error", f"Failed to update schedule: {e}")
+
+    def _apply_updated_schedule(self, schedule, changes):
+        # Rebuild the display data in one pass.
+        sheet_data = [[date_str, *(", ".join(rec[2] for rec in shifts.get(shift, ()))
+                                   for shift in self.shift_types)]
+                      for date_str, shifts in sorted(schedule.items())]
+        if Sheet:
+            self.sheet.set_sheet_data(sheet_data)
+        else:
+            self.tree.delete(*self.tree.get_children())
+            for row in sheet_data:
+                self.tree.insert("", "end", values=row)
+        self._schedule_op_done("info", "Update Complete", f"Schedule updated. {changes} shift(s) changed.")
 
     def edit_cell_command(self, event):
         # event is expected to be a tuple like (widget, row, col, ...)
@@ -912,7 +1355,7 @@ class ScheduleTab(tk.Frame):
         shift_type = self.shift_types[col - 1]
         date_str = self.sheet.get_cell_data(row, 0)
         # Get the corresponding shift record from the database
-        cursor = self.db_manager.conn.cursor()
+        cursor = self._edit_cursor
         cursor.execute("SELECT id, employee_id FROM shifts WHERE shift_date=? AND shift_type=?", (date_str, shift_type))
         record = cursor.fetchone()
         if not record:
@@ -930,43 +1373,32 @@ class ScheduleTab(tk.Frame):
 
     def filter_schedule(self):
         selected = self.employee_filter_var.get()
-        year = self.year_var.get()
-        month = self.month_var.get()
+        year = self.current_date.year
+        month = self.current_date.month
         if selected == "All":
             # Re–generate full schedule if "All" is selected
             self.generate_schedule()
             return
         emp_id = int(selected.split(":")[0])
-        # Get all shifts for the month
-        shifts = self.db_manager.get_shifts_for_month(year, month)
-        # Build a filtered schedule dictionary with only the selected employee's shifts
+        # Only this employee's shifts; the filter runs in SQL against the
+        # (employee_id, shift_date) index.
+        shifts = self.db_manager.get_shifts_for_employee_month(year, month, emp_id)
         schedule = {}
-        for shift in shifts:
-            shift_id, shift_date, shift_type, employee_id, emp_name = shift
-            if employee_id == emp_id:
-                if shift_date not in schedule:
-                    schedule[shift_date] = {}
-                schedule[shift_date][shift_type] = emp_name
+        for shift_id, shift_date, shift_type, employee_id, emp_name in shifts:
+            schedule.setdefault(shift_date, {})[shift_type] = emp_name
         # Build the sheet (or treeview) data accordingly:
-        sheet_data = []
         first_day = datetime.date(year, month, 1)
-        if month == 12:
-            next_month = datetime.date(year+1, 1, 1)
-        else:
-            next_month = datetime.date(year, month+1, 1)
+        next_month = datetime.date(year + month // 12, month % 12 + 1, 1)
         days = (next_month - first_day).days
-        for day in range(1, days + 1):
-            date_str = datetime.date(year, month, day).strftime("%Y-%m-%d")
-            row = [date_str]
-            for shift in self.shift_types:
-                value = schedule.get(date_str, {}).get(shift, "")
-                row.append(value)
-            sheet_data.append(row)
+        empty = {}
+        sheet_data = [[date_str, *(schedule.get(date_str, empty).get(shift, "")
+                                   for shift in self.shift_types)]
+                      for date_str in (f"{year:04d}-{month:02d}-{day:02d}"
+                                       for day in range(1, days + 1))]
         if Sheet:
             self.sheet.set_sheet_data(sheet_data)
         else:
-            for row in self.tree.get_children():
-                self.tree.delete(row)
+            self.tree.delete(*self.tree.get_children())
             for row in sheet_data:
                 self.tree.insert("", "end", values=row)
 
@@ -995,7 +1427,7 @@ class ScheduleTab(tk.Frame):
         date_str = row_values[0]
 
         # Query the shift record
-        cursor = self.db_manager.conn.cursor()
+        cursor = self._edit_cursor
         cursor.execute("SELECT id, employee_id FROM shifts WHERE shift_date=? AND shift_type=?",
                     (date_str, shift_type))
         record = cursor.fetchone()
@@ -1026,22 +1458,18 @@ class ScheduleTab(tk.Frame):
         month = self.current_date.month
         schedule = self.db_manager.get_schedule(year, month)
         if schedule:
-            sheet_data = []
             # Convert the saved schedule dictionary into sheet data.
-            for date_str, shifts in sorted(schedule.items()):
-                row = [date_str]
-                for shift in self.shift_types:
-                    value = shifts.get(shift, "")
-                    if isinstance(value, list):
-                        row.append(", ".join(value))
-                    else:
-                        row.append(value)
-                sheet_data.append(row)
+            # (Older snapshots stored a plain string per cell, newer ones a
+            # list of names.)
+            def cell(value):
+                return ", ".join(value) if isinstance(value, list) else value
+            sheet_data = [[date_str, *(cell(shifts.get(shift, ""))
+                                       for shift in self.shift_types)]
+                          for date_str, shifts in sorted(schedule.items())]
             if Sheet:
                 self.sheet.set_sheet_data(sheet_data)
             else:
-                for row in self.tree.get_children():
-                    self.tree.delete(row)
+                self.tree.delete(*self.tree.get_children())
                 for row in sheet_data:
                     self.tree.insert("", "end", values=row)
         else:
@@ -1049,8 +1477,7 @@ class ScheduleTab(tk.Frame):
             if Sheet:
                 self.sheet.set_sheet_data([])
             else:
-                for row in self.tree.get_children():
-                    self.tree.delete(row)
+                self.tree.delete(*self.tree.get_children())
             # Optionally, you can show a message that no schedule exists.
             # messagebox.showinfo("Info", f"No saved schedule for {self.current_date.strftime('%B %Y')}.")
 
@@ -1094,23 +1521,24 @@ class ScheduleTab(tk.Frame):
         - red background if the day is a non-working festivity
         - yellow background if the day is a working festivity
         """
+        # Clear stale highlights from the previous month, apply the new ones
+        # with redraw suppressed, then redraw once at the end — each
+        # highlight_cells call would otherwise trigger its own repaint.
+        self.sheet.dehighlight_all(redraw=False)
         for row_index, row_values in enumerate(sheet_data):
             date_str = row_values[0]
             if date_str in festivities:
                 # If festivities[date_str] == False => non-working => red
                 # If festivities[date_str] == True  => working => yellow
-                if festivities[date_str]:
-                    bg_color = "yellow"
-                else:
-                    bg_color = "red"
+                bg_color = "yellow" if festivities[date_str] else "red"
                 # tksheet has highlight_cells() for row or for individual cells
                 self.sheet.highlight_cells(
-                    row=row_index, 
+                    row=row_index,
                     column=0,       # date column only, or skip 'column' to highlight the entire row
-                    bg=bg_color
+                    bg=bg_color,
+                    redraw=False
                 )
-                # If you want to highlight the entire row: 
-                # self.sheet.highlight_cells(row=row_index, bg=bg_color)
+        self.sheet.refresh()
 
     def insert_festivity_treeview_row(self, row_values, festivities):
         """
@@ -1180,13 +1608,15 @@ class AbsenceDialog(tk.Toplevel):
             absence_type = self.type_entry.get().strip()
             if not start_date or not end_date or not absence_type:
                 raise ValueError("All fields are required.")
+            new_id = self.db_manager.add_absence(employee_id, start_date, end_date, absence_type)
             self.result = {
+                "id": new_id,
                 "employee_id": employee_id,
+                "employee_name": emp_key.split(": ", 1)[1],
                 "start_date": start_date,
                 "end_date": end_date,
                 "absence_type": absence_type
             }
-            self.db_manager.add_absence(employee_id, start_date, end_date, absence_type)
             self.destroy()
         except Exception as e:
             messagebox.showerror("Error", f"Invalid input: {e}")
@@ -1211,23 +1641,52 @@ class AbsencesTab(tk.Frame):
         btn_frame.pack(pady=10)
         tk.Button(btn_frame, text="Add Absence", command=self.add_absence).pack(side=tk.LEFT, padx=5)
         tk.Button(btn_frame, text="Delete Absence", command=self.delete_absence).pack(side=tk.LEFT, padx=5)
+        tk.Button(btn_frame, text="Show All",
+                  command=lambda: self.refresh_tree(show_all=True)).pack(side=tk.LEFT, padx=5)
 
         self.refresh_tree()
 
-    def refresh_tree(self):
-        for row in self.tree.get_children():
-            self.tree.delete(row)
+    def refresh_tree(self, show_all=False):
+        """
+        List absences from the last 12 months (newest first) so the load
+        stays constant-time as history grows; Show All loads everything.
+        """
+        self.tree.delete(*self.tree.get_children())
         cursor = self.db_manager.conn.cursor()
-        cursor.execute('''SELECT a.id, e.name, a.start_date, a.end_date, a.absence_type
-                          FROM absences a
-                          JOIN employees e ON a.employee_id = e.id''')
-        for row in cursor.fetchall():
-            self.tree.insert("", "end", values=row)
+        sql = '''SELECT a.id, e.name, a.start_date, a.end_date, a.absence_type
+                 FROM absences a
+                 JOIN employees e ON a.employee_id = e.id'''
+        params = ()
+        if not show_all:
+            cutoff = (datetime.date.today() - datetime.timedelta(days=365)).isoformat()
+            sql += " WHERE a.end_date >= ?"
+            params = (cutoff,)
+        sql += " ORDER BY a.start_date DESC"
+        for row in cursor.execute(sql, params):
+            # iid = absence id, so targeted row operations don't need a
+            # full rebuild afterwards.
+            self.tree.insert("", "end", iid=str(row[0]), values=tuple(row))
+
+    def _date_sorted_index(self, start_date):
+        """Index that keeps the tree ordered newest-first by start date,
+        matching refresh_tree's ORDER BY a.start_date DESC."""
+        index = 0
+        for iid in self.tree.get_children():
+            if str(self.tree.set(iid, "start_date")) <= start_date:
+                return index
+            index += 1
+        return "end"
 
     def add_absence(self):
         dialog = AbsenceDialog(self, self.db_manager)
         self.wait_window(dialog)
-        self.refresh_tree()
+        if dialog.result:
+            # Insert just the new row at its date-ordered position instead
+            # of reloading the whole list.
+            r = dialog.result
+            self.tree.insert("", self._date_sorted_index(r["start_date"]), iid=str(r["id"]),
+                             values=(r["id"], r["employee_name"], r["start_date"],
+                                     r["end_date"], r["absence_type"]))
 
     def delete_absence(self):
         selected = self.tree.selection()
@@ -1237,10 +1696,9 @@ class AbsencesTab(tk.Frame):
         item = self.tree.item(selected[0])
         absence_id = item["values"][0]
         if messagebox.askyesno("Confirm Delete", "Are you sure you want to delete this absence?"):
-            cursor = self.db_manager.conn.cursor()
-            cursor.execute("DELETE FROM absences WHERE id=?", (absence_id,))
-            self.db_manager.conn.commit()
-            self.refresh_tree()
+            self.db_manager.delete_absence(absence_id)
+            # Drop just the deleted row instead of rebuilding the list.
+            self.tree.delete(selected[0])
 
 
 # =============================================================================
@@ -1326,12 +1784,24 @@ class FestivitiesTab(tk.Frame):
         self.refresh_tree()
 
     def refresh_tree(self):
-        for row in self.tree.get_children():
-            self.tree.delete(row)
+        self.tree.delete(*self.tree.get_children())
         cursor = self.db_manager.conn.cursor()
         cursor.execute("SELECT id, date, is_working_day FROM festivities ORDER BY date")
         for fest_id, date_str, is_working_day in cursor.fetchall():
-            self.tree.insert("", "end", values=(fest_id, date_str, is_working_day))
+            # iid = festivity id so add/edit/delete can touch single rows.
+            self.tree.insert("", "end", iid=str(fest_id), values=(fest_id, date_str, is_working_day))
+
+    def _date_sorted_index(self, date_str, skip_iid=None):
+        """Index that keeps the tree ordered by its date column.
+        skip_iid leaves a row being moved out of the count."""
+        index = 0
+        for iid in self.tree.get_children():
+            if iid == skip_iid:
+                continue
+            if str(self.tree.set(iid, "date")) > date_str:
+                return index
+            index += 1
+        return "end"
 
     def add_festivity(self):
         dialog = FestivityDialog(self, self.db_manager)
@@ -1339,8 +1809,10 @@ class FestivitiesTab(tk.Frame):
         if dialog.result:
             date_str = dialog.result["date"]
             is_working_day_bool = dialog.result["is_working_day"]
-            self.db_manager.add_festivity(date_str, is_working_day_bool)
-            self.refresh_tree()
+            fest_id = self.db_manager.add_festivity(date_str, is_working_day_bool)
+            # Insert just the new row at its date-ordered position.
+            self.tree.insert("", self._date_sorted_index(date_str), iid=str(fest_id),
+                             values=(fest_id, date_str, 1 if is_working_day_bool else 0))
 
     def edit_festivity(self):
         # First, find the currently selected row
@@ -1363,15 +1835,12 @@ class FestivitiesTab(tk.Frame):
         if dialog.result:
             new_date = dialog.result["date"]
             new_working_bool = dialog.result["is_working_day"]
-            # Just do an UPDATE in the DB
-            cursor = self.db_manager.conn.cursor()
-            cursor.execute("""
-                UPDATE festivities
-                SET date=?, is_working_day=?
-                WHERE id=?
-            """, (new_date, 1 if new_working_bool else 0, fest_id))
-            self.db_manager.conn.commit()
-            self.refresh_tree()
+            self.db_manager.update_festivity(fest_id, new_date, new_working_bool)
+            # Update the row in place and re-seat it if the date changed.
+            iid = selected[0]
+            self.tree.item(iid, values=(fest_id, new_date, 1 if new_working_bool else 0))
+            index = self._date_sorted_index(new_date, skip_iid=iid)
+            self.tree.move(iid, "", "end" if index == "end" else index)
 
     def delete_festivity(self):
         selected = self.tree.selection()
@@ -1381,10 +1850,9 @@ class FestivitiesTab(tk.Frame):
         item = self.tree.item(selected[0])
         fest_id = item["values"][0]
         if messagebox.askyesno("Confirm Delete", "Are you sure you want to delete this festivity?"):
-            cursor = self.db_manager.conn.cursor()
-            cursor.execute("DELETE FROM festivities WHERE id=?", (fest_id,))
-            self.db_manager.conn.commit()
-            self.refresh_tree()
+            self.db_manager.delete_festivity(fest_id)
+            # Drop just the deleted row.
+            self.tree.delete(selected[0])
 
 
 # =============================================================================
@@ -1420,11 +1888,15 @@ class SettingsTab(tk.Frame):
 
     def save_settings(self):
         try:
+            # Validate everything first, then write all keys in one
+            # transaction instead of one commit per setting.
+            values = {}
             for key, var in self.entries.items():
                 value = var.get().strip()
                 if not value:
                     raise ValueError(f"Value for {key} cannot be empty.")
-                self.db_manager.set_setting(key, value)
+                values[key] = value
+            self.db_manager.set_settings(values)
             messagebox.showinfo("Settings Updated", "Settings have been updated successfully.")
         except Exception as e:
             messagebox.showerror("Error", f"Failed to update settings: {e}")
@@ -1440,32 +1912,41 @@ class ShiftSchedulerApp(tk.Tk):
         self.geometry("900x700")
         self.db_manager = DatabaseManager()
 
-        notebook = ttk.Notebook(self)
-        notebook.pack(fill=tk.BOTH, expand=True)
-
-        self.emp_tab = EmployeeTab(notebook, self.db_manager)
-        notebook.add(self.emp_tab, text="Employees")
-
-        self.schedule_tab = ScheduleTab(notebook, self.db_manager)
-        notebook.add(self.schedule_tab, text="Schedule")
-
-        self.stats_tab = StatsTab(notebook, self.db_manager)
-        notebook.add(self.stats_tab, text="Statistics")
-
-        self.settings_tab = SettingsTab(notebook, self.db_manager)
-        notebook.add(self.settings_tab, text="Settings")
-
-        self.absences_tab = AbsencesTab(notebook, self.db_manager)
-        notebook.add(self.absences_tab, text="Absences")
-        
-        self.fest_tab = FestivitiesTab(notebook, self.db_manager)
-        notebook.add(self.fest_tab, text="Festivities")
-
+        self.notebook = ttk.Notebook(self)
+        self.notebook.pack(fill=tk.BOTH, expand=True)
+
+        # Each tab constructor runs its own queries (employee list, saved
+        # schedule, ...), so building all six eagerly made startup pay for
+        # every tab. Add a placeholder frame per tab and build the real
+        # widget into it the first time that tab is selected; selecting
+        # the initial tab fires <<NotebookTabChanged>> and builds it too.
+        self._pending_tabs = {}
+        for attr, tab_cls, text in (
+                ("emp_tab", EmployeeTab, "Employees"),
+                ("schedule_tab", ScheduleTab, "Schedule"),
+                ("stats_tab", StatsTab, "Statistics"),
+                ("settings_tab", SettingsTab, "Settings"),
+                ("absences_tab", AbsencesTab, "Absences"),
+                ("fest_tab", FestivitiesTab, "Festivities")):
+            placeholder = tk.Frame(self.notebook)
+            self.notebook.add(placeholder, text=text)
+            self._pending_tabs[str(placeholder)] = (attr, tab_cls, placeholder)
+        self.notebook.bind("<<NotebookTabChanged>>", self._build_selected_tab)
 
         self.lift()
         self.focus_force()
         self.update_idletasks()
 
+    def _build_selected_tab(self, event=None):
+        """Create the selected tab's real content on first visit."""
+        pending = self._pending_tabs.pop(self.notebook.select(), None)
+        if pending is None:
+            return
+        attr, tab_cls, placeholder = pending
+        tab = tab_cls(placeholder, self.db_manager)
+        tab.pack(fill=tk.BOTH, expand=True)
+        setattr(self, attr, tab)
+
 
 # =============================================================================
 # Statistics Tab
@@ -1538,82 +2019,23 @@ class StatsTab(tk.Frame):
         # 1. Update the accumulated_hours in the DB (optional, if desired).
         self.db_manager.update_employee_statistics()
 
-        # 2. Gather current month's shifts.
+        # 2. One aggregated query does the shift/festivity categorisation
+        #    in SQLite instead of merging three result sets in Python.
         year = self.current_date.year
         month = self.current_date.month
-        shifts = self.db_manager.get_shifts_for_month(year, month)
-
-        # 3. Get festivity info for the month: { 'YYYY-MM-DD': True/False for is_working_day }
-        festivity_map = self.db_manager.get_festivities_for_month(year, month)
-
-        # 4. Prepare stats dict.
-        #    We'll store per-employee:
-        #        normal_shifts, normal_hours, fest_shifts, fest_hours, target_hours, accumulated_hours
-        stats = {}
-        
-        # 5. Gather employees to fill in target/accumulated data even if they have 0 shifts
-        all_employees = {e["id"]: e for e in self.db_manager.get_employees()}
-
-        # 6. SHIFT loop: categorize each shift
-        for shift_id, shift_date, shift_type, emp_id, emp_name in shifts:
-            # If not in stats, initialize
-            if emp_id not in stats:
-                stats[emp_id] = {
-                    "name": emp_name,
-                    "normal_shifts": 0,
-                    "normal_hours": 0,
-                    "fest_shifts": 0,
-                    "fest_hours": 0,
-                    "target": all_employees[emp_id]["target_hours"],
-                    "accumulated": all_employees[emp_id]["accumulated_hours"],
-                }
-            # Determine shift duration from settings (morning/afternoon/night).
-            # You already have something like:
-            duration_map = {
-                "Morning": int(self.db_manager.get_setting("duration_morning")),
-                "Afternoon": int(self.db_manager.get_setting("duration_afternoon")),
-                "Night": int(self.db_manager.get_setting("duration_night"))
-            }
-            shift_hours = duration_map.get(shift_type, 8)
-
-            # Check if date is festive
-            # If it's in festivity_map but is_working_day=False => it's a "non-working" festivity.
-            is_festive = False
-            if shift_date in festivity_map:
-                # If is_working_day == False, treat as festive
-                is_festive = not festivity_map[shift_date]
-
-            if is_festive:
-                stats[emp_id]["fest_shifts"] += 1
-                stats[emp_id]["fest_hours"] += shift_hours
-            else:
-                stats[emp_id]["normal_shifts"] += 1
-                stats[emp_id]["normal_hours"] += shift_hours
-
-        # 7. For employees who had no shifts in this month, still fill data
-        for emp_id, emp_data in all_employees.items():
-            if emp_id not in stats:
-                stats[emp_id] = {
-                    "name": emp_data["name"],
-                    "normal_shifts": 0,
-                    "normal_hours": 0,
-                    "fest_shifts": 0,
-                    "fest_hours": 0,
-                    "target": emp_data["target_hours"],
-                    "accumulated": emp_data["accumulated_hours"],
-                }
+        rows = self.db_manager.get_month_stats(year, month)
 
-        # 8. Clear existing rows from the Treeview
-        for row in self.tree.get_children():
-            self.tree.delete(row)
+        # 3. Clear existing rows from the Treeview
+        self.tree.delete(*self.tree.get_children())
 
-        # 9. Insert updated rows
-        for emp_id, s in stats.items():
+        # 4. Insert updated rows
+        for (emp_id, name, target, accumulated,
+             normal_shifts, normal_hours, fest_shifts, fest_hours) in rows:
             self.tree.insert("", "end", values=(
-                s["name"],
-                s["normal_shifts"], s["normal_hours"],
-                s["fest_shifts"],   s["fest_hours"],
-                s["target"],        s["accumulated"]
+                name,
+                normal_shifts, normal_hours,
+                fest_shifts,   fest_hours,
+                target,        accumulated
             ))
 
 